@@ -1,4 +1,11 @@
-#!/usr/bin/env -S uv run python
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "pathspec>=0.12",
+#     "pyyaml>=6.0.2",
+# ]
+# ///
 """
 paquet_facile.py
 A tool for syncing the sites-faciles codebase and applying transformations.
@@ -9,18 +16,52 @@ Clones a specific version from upstream and applies namespacing transformations.
 from __future__ import annotations
 
 import argparse
+import codecs
+import collections
 import concurrent.futures
+import contextlib
+import errno
+import fnmatch
+import functools
 import logging
+import mmap
 import os
 import re
 import shutil
+import stat
 import subprocess
 import sys
+import tempfile
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from re import _constants as _sre_constants, _parser as _sre_parse
+from typing import Any, AnyStr, Callable, Iterator
 
 import yaml
 
+try:
+    # Optional: faster single-scan matching for runs of literal rules
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    # Optional: reads the git index in-process for --git-tracked-only
+    import pygit2
+except ImportError:
+    pygit2 = None
+
+try:
+    # Declared in the script metadata; without it, the tree walk cannot apply
+    # .gitignore files (--git-tracked-only does not need it)
+    import pathspec
+except ImportError:
+    pathspec = None
+
+# Prefer the libyaml-backed loader when PyYAML was built with it
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 # -- Logging ------------------------------------------------------------------
 
 
@@ -47,43 +88,234 @@ def run_command(
     cmd: list[str],
     cwd: Path | None = None,
     check: bool = True,
+    text: bool = True,
 ) -> subprocess.CompletedProcess:
-    """Run a shell command and return the result."""
+    """Run a shell command and return the result.
+
+    With text=False, stdout and stderr are left as bytes.
+    """
     logging.debug("Running: %s", " ".join(cmd))
     try:
         result = subprocess.run(
             cmd,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
+            text=text,
             check=check,
             cwd=cwd,
         )
         return result
     except subprocess.CalledProcessError as exc:
         logging.error("Command failed: %s", " ".join(cmd))
-        logging.error("Error: %s", exc.stderr)
+        stderr = exc.stderr
+        if isinstance(stderr, bytes):
+            stderr = stderr.decode(errors="replace")
+        logging.error("Error: %s", stderr)
         raise
 
 
-def git_ls_files(pattern: str | None = None) -> list[str]:
-    """Return tracked files matching a git pathspec (pattern)."""
-    cmd = ["git", "ls-files"] + ([pattern] if pattern else [])
+def _tracked_files_via_pygit2(root: Path) -> list[str] | None:
+    """
+    Read tracked paths straight from the index with pygit2.
+    Returns None when pygit2 is unavailable or cannot be relied upon.
+    """
+    if pygit2 is None:
+        return None
 
     try:
-        result = run_command(cmd, check=False)
-        if result.returncode != 0:
-            logging.error("git ls-files failed: %s", result.stderr)
-            return []
+        repo = pygit2.Repository(str(root))
+        # The index also lists files left out of a sparse checkout, and pygit2
+        # does not expose the skip-worktree flag needed to tell them apart
+        if "core.sparseCheckout" in repo.config and repo.config.get_bool(
+            "core.sparseCheckout"
+        ):
+            return None
+        return [entry.path for entry in repo.index]
+    except (pygit2.GitError, KeyError, ValueError) as exc:
+        logging.debug("pygit2 could not read the index: %s", exc)
+        return None
+
+
+def _list_tracked_files(root: Path) -> list[str]:
+    """Return every tracked file of the repository at root."""
+    files = _tracked_files_via_pygit2(root)
+    if files is not None:
+        logging.debug("Indexed %d tracked files", len(files))
+        return files
+
+    # Read raw NUL-separated bytes: no text decoding of the whole listing, and
+    # paths containing newlines stay intact
+    try:
+        result = run_command(["git", "ls-files", "-z", "-t"], cwd=root, text=False)
     except Exception as exc:
         logging.error("git ls-files failed: %s", exc)
         return []
 
-    return [s for s in result.stdout.splitlines() if s]
+    # Each entry is "<status> <path>"; "S" marks files left out of a sparse
+    # checkout, which are tracked but absent from the working tree
+    files = [
+        entry[2:].decode("utf-8", "surrogateescape")
+        for entry in result.stdout.split(b"\0")
+        if entry and entry[:1] != b"S"
+    ]
+    logging.debug("Indexed %d tracked files", len(files))
+    return files
+
+
+def _load_ignore_file(path: str) -> Any:
+    """Compile an ignore file (.gitignore syntax), or None if there is none."""
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return pathspec.GitIgnoreSpec.from_lines(fh)
+    except FileNotFoundError:
+        return None
+
+
+def _is_ignored(path: str, ignores: list[tuple[str, Any]]) -> bool:
+    """
+    Tell whether git would ignore path, given the ignore specs that apply to
+    its directory as (directory prefix, spec) pairs, most precedent first.
+    """
+    for prefix, spec in ignores:
+        ignored = spec.check_file(path[len(prefix) :]).include
+        # None: no pattern of this spec matches, ask the next one
+        if ignored is not None:
+            return ignored
+    return False
+
+
+def _walk_files(root: Path, stop: threading.Event | None = None) -> list[str]:
+    """Return every file under root that git does not ignore.
+
+    Unlike _list_tracked_files(), this needs neither a git process nor the
+    index. Like git, it applies the .gitignore files of every directory and
+    .git/info/exclude. In a fresh clone both list the same files, except
+    tracked files matching an ignore pattern (added with --force), which only
+    the git index knows about. Setting stop abandons the walk, which then
+    returns an empty list.
+    """
+    if pathspec is None:
+        logging.warning("⚠️  pathspec is not installed, .gitignore files not applied")
+
+    root_dir = str(root)
+    exclude = None
+    if pathspec is not None:
+        exclude = _load_ignore_file(os.path.join(root_dir, ".git", "info", "exclude"))
+
+    # Ignore specs of the directories walked so far, by directory prefix
+    # ("" for root, otherwise the relative path with a trailing "/")
+    gitignores: dict[str, Any] = {}
+    files: list[str] = []
+    for top, dirnames, filenames, _dirfd in os.fwalk(root):
+        if stop is not None and stop.is_set():
+            logging.debug("Tree walk cancelled")
+            return []
+
+        rel = os.path.relpath(top, root).replace(os.sep, "/") + "/"
+        if rel == "./":
+            rel = ""
+
+        if pathspec is not None and ".gitignore" in filenames:
+            spec = _load_ignore_file(os.path.join(top, ".gitignore"))
+            if spec is not None:
+                gitignores[rel] = spec
+
+        # Deeper .gitignore files take precedence, and all of them over
+        # .git/info/exclude
+        parts = rel.split("/")[:-1]
+        prefixes = [""] + ["/".join(parts[: i + 1]) + "/" for i in range(len(parts))]
+        ignores = [(p, gitignores[p]) for p in reversed(prefixes) if p in gitignores]
+        if exclude is not None:
+            ignores.append(("", exclude))
+
+        # Files of an ignored directory cannot be re-included: prune it
+        dirnames[:] = [
+            d
+            for d in dirnames
+            if d != ".git" and not _is_ignored(f"{rel}{d}/", ignores)
+        ]
+        for name in filenames:
+            path = rel + name
+            if not _is_ignored(path, ignores):
+                files.append(path)
+
+    # Same ordering as git ls-files
+    files.sort()
+    logging.debug("Found %d files in the working tree", len(files))
+    return files
+
+
+def _race_file_listings(root: Path) -> list[str]:
+    """
+    Run git ls-files and the tree walk concurrently and keep whichever
+    finishes first with a result, falling back to the other one if it fails.
+    The loser is cancelled (tree walk) or waited for (git), so that no thread
+    is left running when the worker pool forks.
+    """
+    stop_walk = threading.Event()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        futures = {
+            executor.submit(_list_tracked_files, root): "git ls-files",
+            executor.submit(_walk_files, root, stop_walk): "tree walk",
+        }
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                files = future.result()
+            except Exception as exc:
+                logging.warning(
+                    "⚠️  File listing by %s failed: %s", futures[future], exc
+                )
+                continue
+
+            if files:
+                logging.debug("File listing won by %s", futures[future])
+                stop_walk.set()
+                return files
+
+    return []
+
+
+# Where the file listing comes from: the working tree, the git index, or
+# whichever of the two answers first
+FILE_SOURCES = {
+    "walk": _walk_files,
+    "git": _list_tracked_files,
+    "race": _race_file_listings,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _pathspec_re(pattern: str) -> re.Pattern[str]:
+    """Compile a plain (non-magic) git pathspec into a regex, once per pattern."""
+    if any(c in pattern for c in "*?["):
+        return re.compile(fnmatch.translate(pattern))
+
+    # Without wildcards, a pathspec matches the file itself or a directory prefix
+    prefix = re.escape(pattern.rstrip("/"))
+    return re.compile(rf"{prefix}(?:/.*)?\Z", re.DOTALL)
+
+
+def filter_files(all_files: list[str], pattern: str | None = None) -> list[str]:
+    """Return the files of a repository listing matching a git pathspec (pattern)."""
+    if not pattern:
+        return all_files
+
+    match = _pathspec_re(pattern).match
+    return [f for f in all_files if match(f)]
+
 
+def git_clone(
+    repo_url: str,
+    tag: str,
+    target_dir: Path,
+    sparse_paths: list[str] | None = None,
+) -> None:
+    """Clone a git repository at a specific tag.
 
-def git_clone(repo_url: str, tag: str, target_dir: Path) -> None:
-    """Clone a git repository at a specific tag."""
+    Blobs are fetched lazily (partial clone), so only the files actually checked
+    out are downloaded. When sparse_paths is given, the checkout is restricted
+    to those directories (plus top-level files).
+    """
     logging.info("📥 Cloning %s @ %s", repo_url, tag)
 
     cmd = [
@@ -92,15 +324,25 @@ def git_clone(repo_url: str, tag: str, target_dir: Path) -> None:
         "--quiet",
         "-c",
         "advice.detachedHead=false",
+        "--filter=blob:none",
         "--branch",
         tag,
         "--depth",
         "1",
-        repo_url,
-        str(target_dir),
     ]
+    if sparse_paths:
+        cmd.append("--sparse")
+    cmd += [repo_url, str(target_dir)]
 
     run_command(cmd)
+
+    if sparse_paths:
+        logging.info("🌱 Restricting checkout to %s", ", ".join(sparse_paths))
+        run_command(
+            ["git", "sparse-checkout", "set", "--cone", "--", *sparse_paths],
+            cwd=target_dir,
+        )
+
     logging.info("✅ Clone completed")
 
 
@@ -112,7 +354,7 @@ def load_config(path: Path) -> dict[str, Any]:
     logging.info("📖 Loading rules from %s", path)
     try:
         with path.open("r", encoding="utf-8") as fh:
-            return yaml.safe_load(fh) or {}
+            return yaml.load(fh, Loader=_YAML_LOADER) or {}
     except FileNotFoundError:
         logging.error("Config file not found: %s", path)
         sys.exit(2)
@@ -124,14 +366,161 @@ def load_config(path: Path) -> dict[str, Any]:
         sys.exit(2)
 
 
-def expand_rules(config: dict[str, Any]) -> list[dict[str, Any]]:
+@dataclass(slots=True)
+class Rule:
+    """A concrete search/replace rule, with all placeholders expanded."""
+
+    search: str
+    replace: str
+    literal: bool = False
+    filter: str | None = None
+    scope: str | None = None
+    path_glob: str | None = None
+
+    # Precompiled forms, filled in by _compile_rule
+    search_re: re.Pattern[str] | None = field(default=None, repr=False)
+    filter_re: re.Pattern[str] | None = field(default=None, repr=False)
+    search_bytes: bytes = field(default=b"", repr=False)
+    replace_bytes: bytes = field(default=b"", repr=False)
+    prescan_re: re.Pattern[bytes] | None = field(default=None, repr=False)
+    literal_hint: str = field(default="", repr=False)
+    literal_hint_bytes: bytes = field(default=b"", repr=False)
+
+
+@dataclass(slots=True)
+class LiteralGroup:
+    """
+    Consecutive literal rules with the same scope that cannot interact with
+    each other, so that applying them in one scan gives the same result as
+    applying them in order.
+    """
+
+    rules: list[Rule]
+
+    @property
+    def scope(self) -> str | None:
+        return self.rules[0].scope
+
+    @property
+    def path_glob(self) -> str | None:
+        return self.rules[0].path_glob
+
+
+# Regex constructs whose meaning differs between str and UTF-8 bytes matching
+# (escapes other than escaped punctuation, ".", negated classes, anchors,
+# inline flags and lookarounds): patterns using them cannot be prescanned.
+_UNSAFE_PRESCAN_RE = re.compile(
+    r"""(?<!\\)(?:\\\\)*(?:\\[^.\\"'()\[\]{}*+?|^$/\-\s]|\.|\[\^|\^|\$|\(\?)"""
+)
+
+
+def _bytes_prescan_re(pattern: str) -> re.Pattern[bytes] | None:
+    """
+    Build a bytes regex that can tell, without decoding, that a str pattern has
+    no match in UTF-8 content. Returns None when this cannot be guaranteed.
+    """
+    if not pattern.isascii() or _UNSAFE_PRESCAN_RE.search(pattern):
+        return None
+
+    try:
+        return re.compile(pattern.encode("ascii"))
+    except re.error:
+        return None
+
+
+_REPEAT_OPS = (
+    _sre_constants.MAX_REPEAT,
+    _sre_constants.MIN_REPEAT,
+    _sre_constants.POSSESSIVE_REPEAT,
+)
+
+
+def _required_literal(pattern: str) -> str:
+    """
+    Return the longest literal string that every match of pattern contains,
+    or "" if none can be determined (alternations, case-insensitive parts...).
+
+    This walks the parse tree of the private re._parser module, assuming its
+    layout as of CPython 3.11-3.13: a sequence of (opcode, argument) nodes,
+    where SUBPATTERN arguments are (group, add_flags, del_flags, items) and
+    repeat arguments are (min, max, items).
+    Any error, from an invalid pattern or a changed layout, only disables the
+    hint: the rule then runs its regex on every candidate file.
+    """
+    best = ""
+
+    def walk(items: Any) -> None:
+        nonlocal best
+        run: list[str] = []
+        for op, av in items:
+            if op is _sre_constants.LITERAL:
+                run.append(chr(av))
+                continue
+
+            if len(run) > len(best):
+                best = "".join(run)
+            run = []
+
+            # Mandatory sub-sequences hold required literals of their own
+            if op is _sre_constants.SUBPATTERN:
+                _group, add_flags, _del_flags, sub = av
+                if not add_flags & re.IGNORECASE:
+                    walk(sub)
+            elif op in _REPEAT_OPS and av[0] >= 1:
+                walk(av[2])
+
+        if len(run) > len(best):
+            best = "".join(run)
+
+    try:
+        parsed = _sre_parse.parse(pattern)
+        if parsed.state.flags & re.IGNORECASE:
+            return ""
+        walk(parsed)
+    except Exception as exc:
+        logging.debug("No literal hint for %r: %s", pattern, exc)
+        return ""
+    return best
+
+
+def _compile_rule(rule: Rule) -> bool:
+    """
+    Precompile the patterns of a concrete rule in place.
+    Returns False if a pattern is invalid and the rule must be dropped.
+    """
+    if rule.literal:
+        rule.search_bytes = rule.search.encode("utf-8")
+        rule.replace_bytes = rule.replace.encode("utf-8")
+        return True
+
+    try:
+        rule.search_re = re.compile(rule.search)
+        if rule.filter:
+            rule.filter_re = re.compile(rule.filter, re.DOTALL)
+    except re.error as exc:
+        logging.error(
+            "Invalid regex pattern %r in rule, skipping: %s", exc.pattern, exc
+        )
+        return False
+
+    rule.prescan_re = _bytes_prescan_re(rule.search)
+    rule.literal_hint = _required_literal(rule.search)
+    rule.literal_hint_bytes = rule.literal_hint.encode("utf-8")
+    return True
+
+
+def expand_rules(config: dict[str, Any]) -> list[Rule | LiteralGroup]:
     """Expand {app}, {package_name}, and {package_name_upper} placeholders into concrete rules and validate minimal schema."""
     apps: list[str] = config.get("apps", [])
     package_name: str = config.get("package_name", "sites_faciles")
     package_name_upper: str = package_name.upper()
     raw_rules: list[dict[str, Any]] = config.get("rules", []) or []
+    package_placeholders = {
+        "{package_name}": package_name,
+        "{package_name_upper}": package_name_upper,
+    }
 
-    expanded: list[dict[str, Any]] = []
+    expanded: list[Rule] = []
     for rule in raw_rules:
         search: str | None = rule.get("search")
         replace: str | None = rule.get("replace")
@@ -141,45 +530,130 @@ def expand_rules(config: dict[str, Any]) -> list[dict[str, Any]]:
             continue
 
         # Replace {package_name} and {package_name_upper} placeholders first
-        search = search.replace("{package_name}", package_name)
-        replace = replace.replace("{package_name}", package_name)
-        search = search.replace("{package_name_upper}", package_name_upper)
-        replace = replace.replace("{package_name_upper}", package_name_upper)
+        search = _render_template(search, package_placeholders)
+        replace = _render_template(replace, package_placeholders)
+
+        literal = bool(rule.get("literal", False))
+        filter_pattern: str | None = rule.get("filter")
+        scope: str | None = rule.get("scope")
+        path_glob: str | None = rule.get("path_glob")
 
         if "{app}" in (search + replace) and apps:
-            for app in apps:
-                expanded.append(
-                    {
-                        **rule,
-                        "search": search.replace("{app}", app),
-                        "replace": replace.replace("{app}", app),
-                    }
-                )
+            pairs = [
+                (search.replace("{app}", app), replace.replace("{app}", app))
+                for app in apps
+            ]
         else:
-            expanded.append({**rule, "search": search, "replace": replace})
+            pairs = [(search, replace)]
+
+        for concrete_search, concrete_replace in pairs:
+            concrete = Rule(
+                search=concrete_search,
+                replace=concrete_replace,
+                literal=literal,
+                filter=filter_pattern,
+                scope=scope,
+                path_glob=path_glob,
+            )
+            if _compile_rule(concrete):
+                expanded.append(concrete)
 
     logging.info(
         "🔧 Expanded %d rules into %d concrete rules", len(raw_rules), len(expanded)
     )
-    return expanded
+
+    return _group_literal_rules(expanded)
+
+
+def _overlap(a: str, b: str) -> bool:
+    """Tell whether occurrences of a and b can share characters in a text."""
+    if a in b or b in a:
+        return True
+    return any(
+        a.endswith(b[:k]) or b.endswith(a[:k]) for k in range(1, min(len(a), len(b)))
+    )
+
+
+def _group_literal_rules(rules: list[Rule]) -> list[Rule | LiteralGroup]:
+    """
+    Merge runs of consecutive literal rules sharing a scope into LiteralGroups.
+    A rule joins the current run only if its search string cannot overlap the
+    search or the replacement of any rule already in it.
+    """
+    grouped: list[Rule | LiteralGroup] = []
+    run: list[Rule] = []
+
+    def flush() -> None:
+        if len(run) > 1:
+            grouped.append(LiteralGroup(run.copy()))
+        else:
+            grouped.extend(run)
+        run.clear()
+
+    for rule in rules:
+        if not rule.literal:
+            flush()
+            grouped.append(rule)
+            continue
+
+        if run and (
+            (rule.scope, rule.path_glob) != (run[0].scope, run[0].path_glob)
+            or any(
+                _overlap(other.search, rule.search)
+                or _overlap(other.replace, rule.search)
+                for other in run
+            )
+        ):
+            flush()
+        run.append(rule)
+
+    flush()
+    logging.debug("Applying %d rules in %d passes", len(rules), len(grouped))
+    return grouped
 
 
 # -- File Classification ------------------------------------------------------
 
 
-def is_text_file(path: Path, text_exts: set[str]) -> bool:
-    """Check if file should be treated as text based on file extension."""
-    return path.suffix in text_exts
+def _looks_like_text(path: str) -> bool:
+    """Sniff the start of a file: text if it has no NUL byte and is valid UTF-8."""
+    try:
+        with open(path, "rb") as fh:
+            head = fh.read(8192)
+    except OSError:
+        return False
+
+    if b"\0" in head:
+        return False
+
+    try:
+        # final=False: the read may have cut a multi-byte character in half
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def is_text_file(path: str, text_exts: set[str], sniff: bool = False) -> bool:
+    """
+    Check if file should be treated as text based on file extension.
+    With sniff, files with other extensions are classified by their content.
+    """
+    if os.path.splitext(path)[1] in text_exts:
+        return True
+    return sniff and _looks_like_text(path)
 
 
-def get_files_for_rule(rule: dict[str, Any], scopes: dict[str, str]) -> list[str]:
-    """Get list of files that match a rule's scope or path_glob."""
-    path_glob: str | None = rule.get("path_glob")
+def get_files_for_rule(
+    rule: Rule | LiteralGroup, scopes: dict[str, str], all_files: list[str]
+) -> list[str]:
+    """Get the files of all_files that match a rule's scope or path_glob."""
+    path_glob: str | None = rule.path_glob
 
     if path_glob:
-        return git_ls_files(path_glob)
+        return filter_files(all_files, path_glob)
 
-    scope_name: str | None = rule.get("scope")
+    scope_name: str | None = rule.scope
     if not scope_name:
         logging.warning("Rule missing both 'path_glob' and 'scope'; skipping: %s", rule)
         return []
@@ -189,120 +663,511 @@ def get_files_for_rule(rule: dict[str, Any], scopes: dict[str, str]) -> list[str
         logging.warning("Unknown scope %r in rule; skipping: %s", scope_name, rule)
         return []
 
-    return git_ls_files(file_glob)
+    return filter_files(all_files, file_glob)
 
 
 # -- File Processing ----------------------------------------------------------
 
 
-def apply_rule_to_text(text: str, rule: dict[str, Any]) -> tuple[str, int]:
+def _replace_counting(
+    data: AnyStr, search: AnyStr, replace: AnyStr
+) -> tuple[AnyStr, int]:
+    """
+    Replace every occurrence of search, like str.replace, and count them.
+    Splitting then joining does both in a single scan (count + replace is two).
+    """
+    parts = data.split(search)
+    if len(parts) == 1:
+        return data, 0
+    return replace.join(parts), len(parts) - 1
+
+
+def apply_rule_to_text(text: str, rule: Rule) -> tuple[str, int]:
     """
     Apply a single rule to text content.
     Returns tuple of (modified_text, replacement_count).
     """
-    search: str = rule["search"]
-    replace: str = rule["replace"]
-    literal: bool = bool(rule.get("literal", False))
-    filter_pattern: str | None = rule.get("filter")
+    search = rule.search
+    replace = rule.replace
+
+    if rule.literal:
+        return _replace_counting(text, search, replace)
+
+    # Regex mode (patterns are precompiled by expand_rules). A substring every
+    # match must contain is much cheaper to look for than the pattern itself.
+    if rule.literal_hint and rule.literal_hint not in text:
+        return text, 0
 
-    if literal:
-        count = text.count(search)
-        if count <= 0:
-            return text, 0
-        return text.replace(search, replace), count
+    search_re = rule.search_re
+    filter_re = rule.filter_re
 
-    # Regex mode
     try:
-        if filter_pattern:
-            # Apply replacement only within sections matching the filter
-            matches = re.findall(filter_pattern, text, re.DOTALL)
-            new_text = text
+        if filter_re:
+            # Apply replacement only within sections matching the filter: its
+            # single capture group if it has one, otherwise the whole match.
+            # The output is spliced from spans in one pass over the text.
+            group = 1 if filter_re.groups == 1 else 0
+            parts: list[str] = []
+            last = 0
             total_count = 0
 
-            for match in matches:
-                replaced_text, count = re.subn(search, replace, match)
-                new_text = new_text.replace(match, replaced_text, 1)
+            for m in filter_re.finditer(text):
+                start, end = m.span(group)
+                if start < 0:
+                    continue
+
+                replaced_text, count = search_re.subn(replace, text[start:end])
+                parts.append(text[last:start])
+                parts.append(replaced_text)
+                last = end
                 total_count += count
 
-            return new_text, total_count
+            if total_count <= 0:
+                return text, 0
+
+            parts.append(text[last:])
+            return "".join(parts), total_count
         else:
-            new_text, count = re.subn(search, replace, text)
+            new_text, count = search_re.subn(replace, text)
             return new_text, count
 
     except re.error as exc:
-        logging.error("Invalid regex pattern %r in rule: %s", search, exc)
+        # Invalid replacement templates only surface on the first match
+        logging.error("Invalid replacement %r in rule: %s", replace, exc)
         return text, 0
 
 
-def apply_rule_to_file(path: Path, rule: dict[str, Any], dry_run: bool) -> bool:
+@functools.lru_cache(maxsize=None)
+def _literal_automaton(searches: tuple[str, ...]) -> Any:
+    """Build (once per process) an Aho-Corasick automaton for the search strings."""
+    automaton = ahocorasick.Automaton()
+    for index, search in enumerate(searches):
+        automaton.add_word(search, (index, len(search)))
+    automaton.make_automaton()
+    return automaton
+
+
+@functools.lru_cache(maxsize=None)
+def _literal_alternation(searches: tuple[str, ...]) -> re.Pattern[str]:
+    """Build (once per process) a regex matching any of the search strings."""
+    return re.compile("|".join(map(re.escape, searches)))
+
+
+def _literal_group_matches(
+    text: str, searches: tuple[str, ...]
+) -> Iterator[tuple[int, int, int]]:
+    """Yield (start, end, index) for occurrences of the search strings."""
+    if ahocorasick is not None:
+        for last, (index, length) in _literal_automaton(searches).iter(text):
+            yield last - length + 1, last + 1, index
+        return
+
+    # Without pyahocorasick, fall back to a single alternation regex: group
+    # members never overlap, so the order of the alternatives does not matter
+    index_of = {search: index for index, search in enumerate(searches)}
+    for m in _literal_alternation(searches).finditer(text):
+        yield m.start(), m.end(), index_of[m.group()]
+
+
+def apply_literal_group_to_text(
+    text: str, group: LiteralGroup
+) -> tuple[str, list[int]]:
     """
-    Apply a single rule to a single file.
-    Returns True if file would be/was changed.
+    Apply all rules of a literal group in a single scan of the text.
+    Returns tuple of (modified_text, replacement_count_per_rule).
     """
-    try:
-        text = path.read_text(encoding="utf-8")
-    except Exception as exc:
-        logging.error("❌ Failed to read %s: %s", path, exc)
-        return False
+    searches = tuple(rule.search for rule in group.rules)
+    counts = [0] * len(searches)
+    parts: list[str] = []
+    last = 0
+
+    # Like str.replace, keep the leftmost non-overlapping matches (only a
+    # search overlapping itself can be skipped)
+    for start, end, index in _literal_group_matches(text, searches):
+        if start < last:
+            continue
+
+        parts.append(text[last:start])
+        parts.append(group.rules[index].replace)
+        last = end
+        counts[index] += 1
+
+    if not parts:
+        return text, counts
+
+    parts.append(text[last:])
+    return "".join(parts), counts
+
+
+def _flatten(rules: list[Rule | LiteralGroup]) -> list[Rule]:
+    """Return the individual rules, in order, with literal groups expanded."""
+    flat: list[Rule] = []
+    for rule in rules:
+        if isinstance(rule, LiteralGroup):
+            flat.extend(rule.rules)
+        else:
+            flat.append(rule)
+    return flat
+
+
+# Below this size, a plain read is cheaper than setting up a memory map
+_MMAP_MIN_SIZE = 64 * 1024
+
+
+def _read_if_matching(
+    path: str, predicate: Callable[[bytes | mmap.mmap], bool]
+) -> bytes | None:
+    """
+    Memory-map a file and copy its content only if predicate accepts the map.
+    Small files are read directly instead. Returns None for files the
+    predicate rejects.
+    """
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size < _MMAP_MIN_SIZE:
+            data = fh.read()
+            return data if predicate(data) else None
+
+        try:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # The file was emptied since the size check, and empty files
+            # cannot be mapped. Regex rules (like "^") can still match them.
+            return b"" if predicate(b"") else None
 
-    new_text, count = apply_rule_to_text(text, rule)
+        with mm:
+            return mm[:] if predicate(mm) else None
 
-    if count <= 0:
+
+def _has_cr(raw: bytes | mmap.mmap) -> bool:
+    """
+    Tell whether raw content has CR line endings. Such content is normalized
+    before rules run, so prescans of the raw bytes cannot rule a match out.
+    """
+    return raw.find(b"\r") != -1
+
+
+def _normalize_newlines(data: bytes) -> tuple[bytes, bytes]:
+    """
+    Translate line endings to LF, as text-mode reads do, when a file uses CRLF
+    (or CR) for every line, so that rules anchored on "$" or "\n" see the same
+    content whatever the platform the file was written on. Returns
+    (normalized_data, newline), where newline is the line ending to restore on
+    write. Other files, with mixed line endings or a stray CR (say in a string
+    literal), are left untouched: restoring one ending for all their lines
+    would rewrite lines no rule matched.
+    """
+    if b"\r" not in data:
+        return data, b"\n"
+
+    # Lone CRs are kept as is (and restored as is) in CRLF files
+    crlf = data.count(b"\r\n")
+    if crlf and crlf == data.count(b"\n"):
+        return data.replace(b"\r\n", b"\n"), b"\r\n"
+    if b"\n" not in data:
+        return data.replace(b"\r", b"\n"), b"\r"
+    return data, b"\n"
+
+
+def apply_literal_rules_to_bytes(
+    path: str, rules: list[Rule]
+) -> tuple[bytes, list[tuple[str, str, int]]] | None:
+    """
+    Apply literal rules directly on the file bytes, skipping UTF-8 decoding.
+    The file is only copied into memory when a search string is present.
+    Rules match LF-normalized content; the file's line endings are restored.
+    Returns (new_content, replacements), or None if the content is unchanged.
+    """
+    needles: list[bytes] = [rule.search_bytes for rule in rules]
+
+    raw = _read_if_matching(
+        path,
+        lambda mm: _has_cr(mm) or any(mm.find(needle) != -1 for needle in needles),
+    )
+    if raw is None:
+        return None
+    data, newline = _normalize_newlines(raw)
+
+    replacements: list[tuple[str, str, int]] = []
+    for rule, needle in zip(rules, needles):
+        data, count = _replace_counting(data, needle, rule.replace_bytes)
+        if count > 0:
+            replacements.append((rule.search, rule.replace, count))
+
+    if not replacements:
+        return None
+
+    # Later rules may have undone earlier ones: only report real changes
+    if newline != b"\n":
+        data = data.replace(b"\n", newline)
+    return (data, replacements) if data != raw else None
+
+
+def _may_match(raw: bytes | mmap.mmap, rule: Rule | LiteralGroup) -> bool:
+    """Tell from the raw file content whether a rule could match it."""
+    # find() rather than "in": mmap only supports "in" for single bytes
+    if isinstance(rule, LiteralGroup):
+        return any(raw.find(member.search_bytes) != -1 for member in rule.rules)
+
+    if rule.literal:
+        return raw.find(rule.search_bytes) != -1
+
+    if rule.literal_hint_bytes and raw.find(rule.literal_hint_bytes) == -1:
         return False
 
-    search = rule["search"]
-    replace = rule["replace"]
-    logging.info("✏️  %s — %d replacement(s) for %r → %r", path, count, search, replace)
+    prescan_re = rule.prescan_re
+    return prescan_re is None or prescan_re.search(raw) is not None
+
+
+def _apply_rules_to_text_file(
+    path: str, rules: list[Rule | LiteralGroup]
+) -> tuple[bytes, list[tuple[str, str, int]]] | None:
+    """Decode a file and apply rules of any kind. Same return value as above."""
+    # Only pay for reading and decoding when at least one rule can match
+    raw = _read_if_matching(
+        path, lambda mm: _has_cr(mm) or any(_may_match(mm, rule) for rule in rules)
+    )
+    if raw is None:
+        return None
+
+    # Literal rules are applied to the UTF-8 bytes directly; the content is
+    # only decoded once a regex rule or a literal group can match it
+    data, newline = _normalize_newlines(raw)
+    text: str | None = None
+
+    replacements: list[tuple[str, str, int]] = []
+    for rule in rules:
+        if text is None:
+            if isinstance(rule, Rule) and rule.literal:
+                data, count = _replace_counting(
+                    data, rule.search_bytes, rule.replace_bytes
+                )
+                if count > 0:
+                    replacements.append((rule.search, rule.replace, count))
+                continue
+
+            if not _may_match(data, rule):
+                continue
+            text = data.decode("utf-8")
+
+        if isinstance(rule, LiteralGroup):
+            text, counts = apply_literal_group_to_text(text, rule)
+            replacements.extend(
+                (member.search, member.replace, count)
+                for member, count in zip(rule.rules, counts)
+                if count > 0
+            )
+            continue
+
+        text, count = apply_rule_to_text(text, rule)
+        if count > 0:
+            replacements.append((rule.search, rule.replace, count))
+
+    if not replacements:
+        return None
+
+    # Later rules may have undone earlier ones: only report real changes
+    if text is not None:
+        data = text.encode("utf-8")
+    if newline != b"\n":
+        data = data.replace(b"\n", newline)
+    return (data, replacements) if data != raw else None
+
+
+def _write_file_atomic(path: str, data: bytes) -> None:
+    """
+    Replace a file's content atomically: write a sibling temp file, then rename
+    it over the original. The original permissions are kept; no fsync is done.
+    """
+    target = os.path.realpath(path)
+    mode = os.stat(target).st_mode & 0o7777
+    fd, tmp = tempfile.mkstemp(
+        dir=os.path.dirname(target), prefix=f".{os.path.basename(target)}."
+    )
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            os.fchmod(fh.fileno(), mode)
+            fh.write(data)
+        os.replace(tmp, target)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp)
+        raise
+
+
+# Rule table of a worker process, set once by _init_worker so that tasks only
+# carry rule indices instead of pickled rules and compiled patterns
+_WORKER_RULES: list[Rule | LiteralGroup] = []
 
+
+def _init_worker(rules: list[Rule | LiteralGroup]) -> None:
+    """Process pool initializer: store the expanded rules in the worker."""
+    global _WORKER_RULES
+    _WORKER_RULES = rules
+
+
+def _apply_indexed_rules_to_file(
+    path: str, rule_indices: tuple[int, ...], dry_run: bool
+) -> tuple[list[tuple[str, str, int]], str | None]:
+    """Worker entry point: apply rules of the worker's table, given by index."""
+    return apply_rules_to_file(path, [_WORKER_RULES[i] for i in rule_indices], dry_run)
+
+
+def apply_rules_to_file(
+    path: str, rules: list[Rule | LiteralGroup], dry_run: bool
+) -> tuple[list[tuple[str, str, int]], str | None]:
+    """
+    Apply all matching rules, in order, to a single file.
+    The file is read and written at most once. Runs in a worker process, so
+    replacements and errors are returned for the parent to log rather than
+    logged here.
+    Returns a list of (search, replace, count) for each rule that matched,
+    empty if the file was left unchanged, and an error message or None.
+    """
+    flat_rules = _flatten(rules)
+    bytes_only = all(rule.literal for rule in flat_rules)
+
+    try:
+        if bytes_only:
+            result = apply_literal_rules_to_bytes(path, flat_rules)
+        else:
+            result = _apply_rules_to_text_file(path, rules)
+    except Exception as exc:
+        return [], f"Failed to read {path}: {exc}"
+
+    if result is None:
+        return [], None
+
+    data, replacements = result
     if dry_run:
-        logging.debug("DRY-RUN: not writing changes to %s", path)
-        return True
+        return replacements, None
 
     try:
-        path.write_text(new_text, encoding="utf-8")
+        _write_file_atomic(path, data)
     except Exception as exc:
-        logging.error("Failed to write %s: %s", path, exc)
-        return False
+        return [], f"Failed to write {path}: {exc}"
 
-    return True
+    return replacements, None
 
 
 # -- Directory Operations -----------------------------------------------------
 
 
 def rename_template_dirs(
-    apps: list[str], package_name: str, dry_run: bool = False
+    root: Path, apps: list[str], package_name: str, dry_run: bool = False
 ) -> None:
     """Move {app}/templates/{app} → {app}/templates/{package_name}_{app}."""
     for app in apps:
-        src = Path(app) / "templates" / app
-        dst = Path(app) / "templates" / f"{package_name}_{app}"
+        src = root / app / "templates" / app
+        dst = root / app / "templates" / f"{package_name}_{app}"
 
         if not src.exists():
             logging.debug("⏭️  No template dir to move for app %r: %s", app, src)
             continue
 
-        if dst.exists():
+        # lexists: os.rename would silently replace an empty directory at dst,
+        # and any other existing entry (file, dangling link) must be kept too
+        if os.path.lexists(dst):
             logging.warning("⚠️  Destination already exists, skipping: %s", dst)
             continue
 
         if dry_run:
             logging.info("[DRY-RUN] Would move: %s → %s", src, dst)
+            continue
+
+        # src and dst share a parent, so this is a single same-device rename
+        try:
+            os.rename(src, dst)
+        except OSError as exc:
+            logging.error("❌ Failed to move %s → %s: %s", src, dst, exc)
         else:
-            logging.info("📂 Moving: %s → %s", src, dst)
-            try:
-                shutil.move(str(src), str(dst))
-            except Exception as exc:
-                logging.error("❌ Failed to move %s → %s: %s", src, dst, exc)
+            logging.info("📂 Moved: %s → %s", src, dst)
 
 
 # -- Refactoring Logic --------------------------------------------------------
 
 
-def _apply_transformations(config_path: Path, dry_run: bool, jobs: int | None) -> None:
-    """Apply transformation rules to the current directory."""
-    # Load configuration
-    config = load_config(config_path)
+def _apply_rules_in_workers(
+    root_dir: str,
+    rules_by_file: dict[str, list[int]],
+    rules: list[Rule | LiteralGroup],
+    dry_run: bool,
+    jobs: int | None,
+) -> tuple[int, collections.Counter[tuple[str, str]]]:
+    """
+    Apply rules, given by index in rules, to the files under root_dir in a pool
+    of worker processes. Returns the number of files changed and the number of
+    replacements per (search, replace) pair.
+    """
+    total_files_changed = 0
+    totals: collections.Counter[tuple[str, str]] = collections.Counter()
+    log_per_file = logging.getLogger().isEnabledFor(logging.DEBUG)
+
+    # Starting a pool (forking, initializing workers) is wasted without files
+    if not rules_by_file:
+        return total_files_changed, totals
+
+    # Regex work is CPU-bound, so use processes to get past the GIL. Each
+    # worker also does its own file I/O; there is no point starting more
+    # workers than there are files (with fork, all of them start up front).
+    workers = min(jobs or os.cpu_count() or 1, len(rules_by_file))
+    # Rules are sent to each worker once; tasks only carry rule indices
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(rules,)
+    ) as executor:
+        futures: dict[
+            concurrent.futures.Future[tuple[list[tuple[str, str, int]], str | None]],
+            str,
+        ] = {
+            executor.submit(
+                _apply_indexed_rules_to_file,
+                os.path.join(root_dir, f),
+                tuple(indices),
+                dry_run,
+            ): f
+            for f, indices in rules_by_file.items()
+        }
+
+        for future in concurrent.futures.as_completed(futures):
+            path = futures[future]
+            try:
+                replacements, error = future.result()
+            except Exception as exc:
+                logging.error("Worker failed on %s: %s", path, exc)
+                continue
+
+            if error:
+                logging.error("❌ %s", error)
+                continue
+
+            if not replacements:
+                continue
+
+            total_files_changed += 1
+            for search, replace, count in replacements:
+                totals[search, replace] += count
+            if log_per_file:
+                for search, replace, count in replacements:
+                    logging.debug(
+                        "✏️  %s — %d replacement(s) for %r → %r",
+                        path,
+                        count,
+                        search,
+                        replace,
+                    )
+                if dry_run:
+                    logging.debug("DRY-RUN: not writing changes to %s", path)
+
+    return total_files_changed, totals
+
+
+def _apply_transformations(
+    config: dict[str, Any],
+    root: Path,
+    dry_run: bool,
+    jobs: int | None,
+    file_source: str = "walk",
+) -> None:
+    """Apply transformation rules to the tree at root."""
     scopes: dict[str, str] = config.get("scopes", {})
     text_extensions_from_cfg: list[str] = config.get("text_extensions", [])
 
@@ -329,38 +1194,40 @@ def _apply_transformations(config_path: Path, dry_run: bool, jobs: int | None) -
     }
     text_exts = set(text_extensions_from_cfg) or DEFAULT_TEXT_EXTENSIONS
     logging.debug("Text extensions: %s", sorted(text_exts))
+    sniff_text_files = bool(config.get("sniff_text_files", False))
 
     # Expand rules
     expanded_rules = expand_rules(config)
 
-    # Process files: apply each rule to all matching files
-    total_files_changed = 0
-    scanned_files = 0
-    all_files_processed = set()
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
-        futures: list[concurrent.futures.Future[bool]] = []
+    # List the files to consider, from the working tree or the git index
+    all_files = FILE_SOURCES[file_source](root)
 
-        for rule in expanded_rules:
-            files = get_files_for_rule(rule, scopes)
+    # Classify every file once, rather than once per matching rule. Paths stay
+    # plain strings: no Path object is built per file of the tree
+    root_dir = str(root)
+    text_files = frozenset(
+        f
+        for f in all_files
+        if is_text_file(os.path.join(root_dir, f), text_exts, sniff_text_files)
+    )
 
-            for f in files:
-                path = Path(f)
-                if not is_text_file(path, text_exts):
-                    continue
+    # Group rules by file, keeping rule order, so each file is handled once
+    rules_by_file: dict[str, list[int]] = {}
+    for index, rule in enumerate(expanded_rules):
+        for f in get_files_for_rule(rule, scopes, all_files):
+            if f not in text_files:
+                continue
 
-                all_files_processed.add(path)
-                future = executor.submit(apply_rule_to_file, path, rule, dry_run)
-                futures.append(future)
+            rules_by_file.setdefault(f, []).append(index)
 
-        scanned_files = len(all_files_processed)
+    scanned_files = len(rules_by_file)
+    total_files_changed, totals = _apply_rules_in_workers(
+        root_dir, rules_by_file, expanded_rules, dry_run, jobs
+    )
 
-        for future in concurrent.futures.as_completed(futures):
-            try:
-                if future.result():
-                    total_files_changed += 1
-            except Exception as exc:
-                logging.error("Worker failed: %s", exc)
+    # One line per rule rather than per (file, rule); per-file detail is -vv
+    for (search, replace), count in totals.most_common():
+        logging.info("✏️  %d replacement(s) for %r → %r", count, search, replace)
 
     logging.warning(
         "🎬 Finished replacements %s: scanned %d files, %d file(s) changed",
@@ -373,30 +1240,154 @@ def _apply_transformations(config_path: Path, dry_run: bool, jobs: int | None) -
     apps: list[str] = config.get("apps", [])
     package_name: str = config.get("package_name", "sites_faciles")
     if apps:
-        rename_template_dirs(apps, package_name, dry_run)
+        rename_template_dirs(root, apps, package_name, dry_run)
 
 
 # -- Sync Command -------------------------------------------------------------
 
 
-def _cleanup_package_dir(package_dir: Path) -> None:
-    """Remove unwanted directories and build files from the package."""
-    # Cleanup unwanted directories and files
-    for path in [".git", ".github"]:
-        full_path = package_dir / path
-        if full_path.exists():
-            logging.debug("Removing %s", full_path)
-            if full_path.is_dir():
-                shutil.rmtree(full_path)
-            else:
-                full_path.unlink()
+def _log_rmtree_error(func: Callable[..., Any], path: str, exc: Any) -> None:
+    """rmtree error handler: log each failure and go on with the rest."""
+    if isinstance(exc, tuple):
+        # onerror handlers (Python < 3.12) get sys.exc_info()
+        exc = exc[1]
+    logging.error("❌ Failed to delete %s: %s", path, exc)
+
+
+# onerror is deprecated in favour of onexc as of Python 3.12
+_RMTREE_ERROR_HANDLER = "onexc" if sys.version_info >= (3, 12) else "onerror"
+
+# A background deletion: the thread running it and the directory it deletes
+Discard = tuple[threading.Thread, Path]
+
+
+def _discard_tree(path: Path) -> Discard | None:
+    """
+    Move a directory out of the way and delete it in a background thread.
+    The deletion must be waited for (_wait_for_discards) before any process
+    is forked.
+    """
+    if not path.exists():
+        return None
+    # Renaming within the same parent is O(1); the slow unlink walk then runs
+    # alongside the rest of the sync instead of blocking it
+    trash = path.with_name(f".{path.name}.old-{os.getpid()}")
+    try:
+        os.rename(path, trash)
+    except OSError as exc:
+        logging.debug("Could not move %s aside (%s), deleting in place", path, exc)
+        shutil.rmtree(path)
+        return None
+    thread = threading.Thread(
+        target=shutil.rmtree,
+        args=(trash,),
+        kwargs={_RMTREE_ERROR_HANDLER: _log_rmtree_error},
+    )
+    thread.start()
+    return thread, trash
+
 
-    # Remove upstream's build files (we'll create our own)
-    for build_file in ["pyproject.toml", "setup.py", "setup.cfg"]:
-        build_path = package_dir / build_file
-        if build_path.exists():
-            logging.debug("Removing upstream %s", build_file)
-            build_path.unlink()
+def _wait_for_discards(discards: list[Discard | None]) -> None:
+    """Wait for background deletions, warning about any they left behind."""
+    for discard in discards:
+        if discard is None:
+            continue
+        thread, trash = discard
+        thread.join()
+        if os.path.lexists(trash):
+            logging.warning("⚠️  Could not fully delete %s", trash)
+
+
+def _remove_leftover_trash(directory: Path) -> None:
+    """
+    Synchronously delete what failed background deletions (_discard_tree)
+    left in a directory, so that it is neither committed nor shipped.
+    Errors are raised.
+    """
+    for leftover in directory.glob(".*.old-*"):
+        logging.warning("⚠️  Removing leftover %s", leftover)
+        shutil.rmtree(leftover)
+
+
+def _cleanup_package_dir(package_dir: Path) -> list[Discard | None]:
+    """
+    Remove unwanted directories and build files from the package.
+    Directories are deleted in background threads, returned for joining.
+    """
+    # Cleanup unwanted directories and files, plus upstream's build files
+    # (we'll create our own). One lstat per path tells both whether it exists
+    # and whether it is a directory.
+    discarded: list[Discard | None] = []
+    for name in [".git", ".github", "pyproject.toml", "setup.py", "setup.cfg"]:
+        full_path = package_dir / name
+        try:
+            mode = os.lstat(full_path).st_mode
+        except FileNotFoundError:
+            continue
+
+        logging.debug("Removing %s", full_path)
+        if stat.S_ISDIR(mode):
+            # .git holds thousands of objects: unlink them concurrently
+            discarded.append(_discard_tree(full_path))
+        else:
+            full_path.unlink()
+
+    return discarded
+
+
+@functools.lru_cache(maxsize=None)
+def _placeholders_re(keys: tuple[str, ...]) -> re.Pattern[str]:
+    """Compile (once per set of keys) a regex matching any placeholder."""
+    # Longest first, so that a key is never shadowed by one of its prefixes
+    return re.compile("|".join(map(re.escape, sorted(keys, key=len, reverse=True))))
+
+
+def _render_template(content: str, placeholders: dict[str, str]) -> str:
+    """Replace every placeholder of a template in a single pass."""
+    pattern = _placeholders_re(tuple(placeholders))
+    return pattern.sub(lambda m: placeholders[m.group()], content)
+
+
+TEMPLATES_DIR = Path("templates")
+
+
+def _iter_template_files(directory: Path) -> Iterator[Path]:
+    """
+    Recursively yield the template files (with .template. in their name) of a
+    directory. File types come from the directory entries, without a stat call.
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_template_files(Path(entry.path))
+            elif ".template." not in entry.name:
+                logging.debug("⏭️  Skipping non-template file: %s", entry.path)
+            elif entry.is_file():
+                yield Path(entry.path)
+
+
+def _read_templates() -> list[tuple[Path, str]]:
+    """
+    Read every template file (with .template. in its name) of the templates
+    directory. Returns (path relative to the templates directory, content) pairs.
+    """
+    templates: list[tuple[Path, str]] = []
+    try:
+        template_files = list(_iter_template_files(TEMPLATES_DIR))
+    except FileNotFoundError:
+        logging.warning("⚠️  Templates directory not found: %s", TEMPLATES_DIR)
+        return []
+
+    for template_file in template_files:
+        try:
+            content = template_file.read_text(encoding="utf-8")
+        except Exception as exc:
+            logging.error("❌ Failed to read template %s: %s", template_file, exc)
+            continue
+
+        templates.append((template_file.relative_to(TEMPLATES_DIR), content))
+
+    return templates
 
 
 def _process_templates(
@@ -405,11 +1396,13 @@ def _process_templates(
     package_name: str,
     tag: str,
     config: dict[str, Any],
+    templates: list[tuple[Path, str]],
 ) -> None:
     """Process all template files and create package structure.
 
-    This function walks through the templates directory and replicates its structure
-    in the target package, processing all template files by replacing placeholders.
+    Replicates the structure of the templates directory in the target package,
+    processing all template files (as read by _read_templates) by replacing
+    placeholders.
     """
     # Transform placeholders for templates
     package_name_title = package_name.replace("_", " ").title()
@@ -435,29 +1428,12 @@ def _process_templates(
         "{apps_list}": apps_list,
     }
 
-    templates_dir = Path("templates")
-    if not templates_dir.exists():
-        logging.warning("⚠️  Templates directory not found: %s", templates_dir)
-        return
-
-    logging.info("📝 Processing template files from %s", templates_dir)
-
-    # Walk through all files in templates directory
-    for template_file in templates_dir.rglob("*"):
-        # Skip directories
-        if template_file.is_dir():
-            continue
-
-        # Skip files that don't have .template. in their name
-        if ".template." not in template_file.name:
-            logging.debug("⏭️  Skipping non-template file: %s", template_file)
-            continue
-
-        # Calculate relative path from templates directory
-        relative_path = template_file.relative_to(templates_dir)
+    logging.info("📝 Processing %d template files", len(templates))
 
+    created_dirs: set[Path] = set()
+    for relative_path, template_content in templates:
         # Determine the output filename (remove .template. from the name)
-        output_filename = template_file.name.replace(".template.", ".")
+        output_filename = relative_path.name.replace(".template.", ".")
 
         # Determine the base directory for output based on file location
         # Files at root level go to package_root, others go to package_dir
@@ -475,27 +1451,21 @@ def _process_templates(
             # Nested template files go to package_dir with their directory structure
             output_dir = package_dir / relative_dir
 
-        # Create output directory if it doesn't exist
-        output_dir.mkdir(parents=True, exist_ok=True)
+        # Create output directory if it doesn't exist (once per directory)
+        if output_dir not in created_dirs:
+            output_dir.mkdir(parents=True, exist_ok=True)
+            created_dirs.add(output_dir)
 
         # Define output file path
         output_file = output_dir / output_filename
 
-        # Read template content
-        try:
-            template_content = template_file.read_text(encoding="utf-8")
-        except Exception as exc:
-            logging.error("❌ Failed to read template %s: %s", template_file, exc)
-            continue
-
         # Replace all placeholders
-        processed_content = template_content
-        for placeholder, value in placeholders.items():
-            processed_content = processed_content.replace(placeholder, value)
+        processed_content = _render_template(template_content, placeholders)
 
-        # Write processed content to output file
+        # Write processed content to output file, encoded in one go
         try:
-            output_file.write_text(processed_content, encoding="utf-8")
+            with open(output_file, "wb") as fh:
+                fh.write(processed_content.encode("utf-8"))
             logging.debug("  Created: %s", output_file.relative_to(package_root))
         except Exception as exc:
             logging.error("❌ Failed to write %s: %s", output_file, exc)
@@ -528,21 +1498,12 @@ def _create_and_push_git_branch(package_dir: Path, tag: str) -> None:
         result = run_command(["git", "remote", "get-url", "origin"], check=False)
         if result.returncode == 0:
             main_repo_remote = result.stdout.strip()
-            logging.info(
-                "📡 Adding remote 'paquet-facile' pointing to %s", main_repo_remote
-            )
 
-            # Add the main repo as a new remote
-            run_command(
-                ["git", "remote", "add", "paquet-facile", main_repo_remote],
-                cwd=package_dir,
-                check=False,
-            )
-
-            # Push the new branch to the remote
-            logging.info("🚀 Pushing branch %s to paquet-facile remote", branch_name)
+            # Push the new branch straight to the main repo's URL: the clone's
+            # .git is deleted right after, so a named remote would be wasted
+            logging.info("🚀 Pushing branch %s to %s", branch_name, main_repo_remote)
             push_result = run_command(
-                ["git", "push", "-f", "paquet-facile", branch_name],
+                ["git", "push", "-f", main_repo_remote, branch_name],
                 cwd=package_dir,
                 check=False,
             )
@@ -564,6 +1525,7 @@ def run_sync(
     dry_run: bool,
     jobs: int | None,
     repo_url: str = "git@github.com:numerique-gouv/sites-faciles.git",
+    file_source: str = "walk",
 ) -> None:
     """Sync sites-faciles from upstream and apply refactoring."""
     # Load config to get package_name
@@ -575,48 +1537,68 @@ def run_sync(
     package_dir = package_root / package_name
 
     # Clean up temp directory if it exists
+    discarded: list[Discard | None] = []
     if temp_dir.exists():
         logging.info("🧹 Removing existing temp directory")
-        shutil.rmtree(temp_dir)
+        discarded.append(_discard_tree(temp_dir))
 
-    # Clone repository
-    git_clone(repo_url, tag, temp_dir)
+    # Templates are local: read them while the clone is downloading
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        templates_future = executor.submit(_read_templates)
 
-    # Change to temp directory and apply transformations
-    original_dir = Path.cwd()
-    try:
-        os.chdir(temp_dir)
-        logging.info("🔧 Applying transformations...")
+        # Clone repository
+        git_clone(repo_url, tag, temp_dir, config.get("sparse_paths"))
 
-        # Adjust config path to be relative to temp dir
-        config_path_adjusted = Path("..") / config_path
-        _apply_transformations(config_path_adjusted, dry_run, jobs)
+    # The process pool forks its workers, which is unsafe while other threads
+    # run: let the deletion of the old temp directory (normally over by now,
+    # as it overlaps the clone) finish first
+    _wait_for_discards(discarded)
+    discarded.clear()
 
-    finally:
-        os.chdir(original_dir)
+    # Apply transformations to the clone
+    logging.info("🔧 Applying transformations...")
+    _apply_transformations(config, temp_dir, dry_run, jobs, file_source)
 
     if dry_run:
         logging.warning("🎬 DRY-RUN: Would create nested structure in %s", package_root)
+        _wait_for_discards(discarded)
         return
 
     # Create package structure: package_name/package_name/
     logging.info("📦 Creating nested package structure")
-    if package_root.exists():
-        shutil.rmtree(package_root)
+    discarded.append(_discard_tree(package_root))
     package_root.mkdir(parents=True)
 
-    # Move cloned content into nested directory
-    shutil.move(str(temp_dir), str(package_dir))
+    # Move cloned content into nested directory: a single rename, unless the
+    # package root sits on another filesystem
+    try:
+        os.rename(temp_dir, package_dir)
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+        shutil.move(str(temp_dir), str(package_dir))
+
+    # Nothing left over by a failed deletion may get into the package
+    _remove_leftover_trash(package_dir)
 
     # Process all templates to create package files
-    _process_templates(package_dir, package_root, package_name, tag, config)
+    _process_templates(
+        package_dir,
+        package_root,
+        package_name,
+        tag,
+        config,
+        templates_future.result(),
+    )
 
     # Create git branch, commit changes, and push (must be done LAST)
     _create_and_push_git_branch(package_dir, tag)
 
     # Cleanup unwanted files and directories
-    _cleanup_package_dir(package_dir)
+    discarded.extend(_cleanup_package_dir(package_dir))
 
+    _wait_for_discards(discarded)
+    _remove_leftover_trash(package_dir)
     logging.warning("✅ Sync completed successfully!")
 
 
@@ -662,7 +1644,23 @@ def main() -> None:
         "--jobs",
         type=int,
         default=None,
-        help="Number of worker threads (default: CPU count)",
+        help="Number of worker processes (default: CPU count)",
+    )
+    discovery = parser.add_mutually_exclusive_group()
+    discovery.add_argument(
+        "--git-tracked-only",
+        dest="file_source",
+        action="store_const",
+        const="git",
+        default="walk",
+        help="List files from the git index instead of walking the tree",
+    )
+    discovery.add_argument(
+        "--race-discovery",
+        dest="file_source",
+        action="store_const",
+        const="race",
+        help="List files with git and a tree walk at once, keeping the fastest",
     )
 
     args = parser.parse_args()
@@ -675,6 +1673,7 @@ def main() -> None:
         dry_run=args.dry_run,
         jobs=args.jobs,
         repo_url=args.repo,
+        file_source=args.file_source,
     )
 
 
@@ -9,8 +9,8 @@ Usage:
     python manage.py migrate_from_sites_faciles
 """
 
-from django.core.management.base import BaseCommand
-from django.db import connection
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
 
 
 class Command(BaseCommand):
@@ -35,6 +35,12 @@ class Command(BaseCommand):
         dry_run = options["dry_run"]
         no_input = options["no_input"]
 
+        # The queries below read pg_class and use PostgreSQL-only syntax
+        if connection.vendor != "postgresql":
+            raise CommandError(
+                f"This command requires PostgreSQL, not {connection.vendor}."
+            )
+
         self.stdout.write(self.style.SUCCESS("Starting database rename operations..."))
         self.stdout.write("=" * 60)
 
@@ -42,38 +48,42 @@ class Command(BaseCommand):
             # Step 1: Get list of tables to rename
             self.stdout.write("\n1. Finding tables to rename...")
 
-            # Build the WHERE clause dynamically from APPS_TO_MIGRATE
-            like_clauses = " OR ".join(
-                [f"table_name LIKE '{app}_%'" for app in self.APPS_TO_MIGRATE]
-            )
+            # Match every APPS_TO_MIGRATE prefix with a single regex, reading
+            # pg_class directly instead of the information_schema view. The
+            # new name of each table is computed by the same query.
+            prefix_pattern = "^(" + "|".join(self.APPS_TO_MIGRATE) + ")_"
 
-            query = f"""
-                SELECT table_name
-                FROM information_schema.tables
-                WHERE table_schema = 'public'
-                  AND ({like_clauses})
-                ORDER BY table_name;
+            query = """
+                SELECT
+                    c.relname,
+                    CASE
+                        WHEN starts_with(c.relname, 'content_manager_')
+                        THEN replace(
+                            c.relname,
+                            'content_manager_',
+                            '{package_name}_content_manager_'
+                        )
+                        ELSE '{package_name}_' || c.relname
+                    END AS new_name
+                FROM pg_class c
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = 'public'
+                  AND c.relkind IN ('r', 'p')
+                  AND c.relname ~ %s
+                ORDER BY c.relname;
             """
-            cursor.execute(query)
+            cursor.execute(query, [prefix_pattern])
 
-            tables_to_rename = cursor.fetchall()
+            table_renames = cursor.fetchall()
 
-            if not tables_to_rename:
+            if not table_renames:
                 self.stdout.write(self.style.WARNING("No tables found to rename."))
                 return
 
             self.stdout.write(
-                self.style.SUCCESS(f"Found {len(tables_to_rename)} tables to rename:")
+                self.style.SUCCESS(f"Found {len(table_renames)} tables to rename:")
             )
-            table_renames = []
-            for (table_name,) in tables_to_rename:
-                if table_name.startswith("content_manager_"):
-                    new_name = table_name.replace(
-                        "content_manager_", "{package_name}_content_manager_"
-                    )
-                else:
-                    new_name = "{package_name}_" + table_name
-                table_renames.append((table_name, new_name))
+            for table_name, new_name in table_renames:
                 self.stdout.write(f"  - {table_name} → {new_name}")
 
             # Step 2: Preview migration updates
@@ -125,60 +135,101 @@ class Command(BaseCommand):
 
             self.stdout.write("\n3. Starting transaction...")
 
-            # Step 4: Rename tables
-            self.stdout.write("\n4. Renaming tables...")
-            renamed_count = 0
-            for table_name, new_name in table_renames:
-                try:
+            # Renames and metadata updates succeed or fail together, so a
+            # failure cannot leave a half-renamed schema behind
+            try:
+                with transaction.atomic():
+                    # Step 4: Rename tables, all in a single round trip
+                    self.stdout.write("\n4. Renaming tables...")
                     cursor.execute(
-                        f'ALTER TABLE "{table_name}" RENAME TO "{new_name}";'
-                    )
-                    self.stdout.write(
-                        self.style.SUCCESS(f"  ✓ Renamed: {table_name} → {new_name}")
+                        "\n".join(
+                            f'ALTER TABLE "{table_name}" RENAME TO "{new_name}";'
+                            for table_name, new_name in table_renames
+                        )
                     )
-                    renamed_count += 1
-                except Exception as e:
+                    for table_name, new_name in table_renames:
+                        self.stdout.write(
+                            self.style.SUCCESS(
+                                f"  ✓ Renamed: {table_name} → {new_name}"
+                            )
+                        )
+
                     self.stdout.write(
-                        self.style.ERROR(f"  ✗ Error renaming {table_name}: {e}")
+                        self.style.SUCCESS(f"\nRenamed {len(table_renames)} tables.")
                     )
 
-            self.stdout.write(self.style.SUCCESS(f"\nRenamed {renamed_count} tables."))
-
-            # Step 5: Update django_migrations
-            if migration_updates:
-                self.stdout.write("\n5. Updating django_migrations table...")
-
-                # Build the IN clause dynamically from APPS_TO_MIGRATE
-                apps_in_clause = ", ".join([f"'{app}'" for app in self.APPS_TO_MIGRATE])
+                    # Step 5: Update django_migrations
+                    if migration_updates:
+                        self.stdout.write("\n5. Updating django_migrations table...")
+
+                        # Join against a VALUES list of (old, new) app names
+                        # from step 2, passed as query parameters
+                        values_clause = ", ".join(["(%s, %s)"] * len(migration_updates))
+
+                        query = f"""
+                            WITH map(old, new) AS (VALUES {values_clause})
+                            UPDATE django_migrations d
+                            SET app = m.new
+                            FROM map m
+                            WHERE d.app = m.old;
+                        """
+                        cursor.execute(
+                            query,
+                            [
+                                name
+                                for app, new_app, _count in migration_updates
+                                for name in (app, new_app)
+                            ],
+                        )
+                        updated_rows = cursor.rowcount
+                        self.stdout.write(
+                            self.style.SUCCESS(
+                                f"  ✓ Updated {updated_rows} migration records"
+                            )
+                        )
+
+                    # Step 6: Update django_content_type
+                    self.stdout.write("\n6. Updating django_content_type table...")
+
+                    apps_in_clause = ", ".join(
+                        [f"'{app}'" for app in self.APPS_TO_MIGRATE]
+                    )
 
-                query = f"""
-                    UPDATE django_migrations
-                    SET app = '{package_name}_' || app
-                    WHERE app IN ({apps_in_clause});
-                """
-                cursor.execute(query)
-                updated_rows = cursor.rowcount
-                self.stdout.write(
-                    self.style.SUCCESS(f"  ✓ Updated {updated_rows} migration records")
+                    query = f"""
+                        UPDATE django_content_type
+                        SET app_label = '{package_name}_' || app_label
+                        WHERE app_label IN ({apps_in_clause});
+                    """
+                    cursor.execute(query)
+                    updated_content_types = cursor.rowcount
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f"  ✓ Updated {updated_content_types} content type records"
+                        )
+                    )
+            except DatabaseError as e:
+                raise CommandError(
+                    f"Renaming failed, all changes were rolled back: {e}"
+                ) from e
+
+            # Refresh planner statistics of all renamed tables in one pass,
+            # outside the transaction so no lock is held while analyzing
+            self.stdout.write("\nAnalyzing renamed tables...")
+            try:
+                cursor.execute(
+                    "ANALYZE "
+                    + ", ".join(
+                        f'"{new_name}"' for _old_name, new_name in table_renames
+                    )
+                    + ";"
                 )
-
-            # Step 6: Update django_content_type
-            self.stdout.write("\n6. Updating django_content_type table...")
-
-            apps_in_clause = ", ".join([f"'{app}'" for app in self.APPS_TO_MIGRATE])
-
-            query = f"""
-                UPDATE django_content_type
-                SET app_label = '{package_name}_' || app_label
-                WHERE app_label IN ({apps_in_clause});
-            """
-            cursor.execute(query)
-            updated_content_types = cursor.rowcount
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f"  ✓ Updated {updated_content_types} content type records"
+            except DatabaseError as e:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"  ⚠ Tables were renamed, but refreshing their statistics "
+                        f"failed: {e}"
+                    )
                 )
-            )
 
             # Step 7: Verify changes
             self.stdout.write("\n7. Verifying changes...")
@@ -0,0 +1,167 @@
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+import paquet_facile
+
+
+def make_rule(search: str, replace: str, literal: bool = False) -> paquet_facile.Rule:
+    rule = paquet_facile.Rule(search=search, replace=replace, literal=literal)
+    assert paquet_facile._compile_rule(rule)
+    return rule
+
+
+class ApplyRulesToFileTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+
+    def rewrite(self, content: bytes, rules: list) -> bytes:
+        path = os.path.join(self.tmp_dir, "file.py")
+        with open(path, "wb") as fh:
+            fh.write(content)
+        _, error = paquet_facile.apply_rules_to_file(path, rules, dry_run=False)
+        self.assertIsNone(error)
+        with open(path, "rb") as fh:
+            return fh.read()
+
+    def test_stray_cr_keeps_lf_line_endings(self):
+        content = b'from blog.models import X\nfoo = "a\rb"\nline3\n'
+        for rules in (
+            [make_rule("from blog.", "from pkg.blog.", literal=True)],
+            [make_rule(r"from blog\.", "from pkg.blog.")],
+        ):
+            with self.subTest(rules=rules):
+                self.assertEqual(
+                    self.rewrite(content, rules),
+                    b'from pkg.blog.models import X\nfoo = "a\rb"\nline3\n',
+                )
+
+    def test_mixed_line_endings_are_left_alone(self):
+        content = b"from blog.models import X\r\nline2\nline3\r\n"
+        self.assertEqual(
+            self.rewrite(content, [make_rule("blog.", "pkg.blog.", literal=True)]),
+            b"from pkg.blog.models import X\r\nline2\nline3\r\n",
+        )
+
+    def test_crlf_file_is_matched_as_lf_and_restored(self):
+        self.assertEqual(
+            self.rewrite(b"x1\r\ny2\r\n", [make_rule(r"(?m)\d$", "N")]),
+            b"xN\r\nyN\r\n",
+        )
+        self.assertEqual(
+            self.rewrite(b"x1\r\ny2\r\n", [make_rule("1\ny", "-", literal=True)]),
+            b"x-2\r\n",
+        )
+
+    def test_empty_file_can_match(self):
+        self.assertEqual(
+            self.rewrite(b"", [make_rule("^", "# header\n")]), b"# header\n"
+        )
+
+    def test_read_error_is_returned_not_logged(self):
+        path = os.path.join(self.tmp_dir, "missing.py")
+        rules = [make_rule("a", "b", literal=True)]
+        with self.assertNoLogs(level="ERROR"):
+            replacements, error = paquet_facile.apply_rules_to_file(
+                path, rules, dry_run=False
+            )
+        self.assertEqual(replacements, [])
+        self.assertIn(path, error)
+
+
+class RequiredLiteralTestCase(unittest.TestCase):
+    # (pattern, expected hint, texts the pattern matches)
+    CASES = [
+        ("from blog.models", "from blog", ["from blog.models", "from blogXmodels"]),
+        ("foo|bar", "", ["foo", "bar"]),
+        ("x(foo|bar)y", "x", ["xfooy", "xbary"]),
+        ("(foo)?bar", "bar", ["foobar", "bar"]),
+        ("ab(cd)?ef", "ab", ["abcdef", "abef"]),
+        ("start(mid){0,3}end", "start", ["startend", "startmidmidend"]),
+        ("pre(mid){2,3}", "pre", ["premidmid", "premidmidmid"]),
+        ("a(bcd)+e", "bcd", ["abcde", "abcdbcde"]),
+        ("ab*cde", "cde", ["acde", "abbcde"]),
+        ("(?i)blog", "", ["blog", "BLOG", "Blog"]),
+        ("from (?i:blog)", "from ", ["from blog", "from BLOG"]),
+        ("(?i:Blog)Models", "Models", ["blogModels", "BLOGModels"]),
+        ("(?-i:blog)", "blog", ["blog"]),
+        ("(", "", []),
+        ("a{", "a{", ["a{"]),
+    ]
+
+    def test_hint_is_in_every_match(self):
+        for pattern, expected, texts in self.CASES:
+            with self.subTest(pattern=pattern):
+                hint = paquet_facile._required_literal(pattern)
+                self.assertEqual(hint, expected)
+                try:
+                    regex = re.compile(pattern)
+                except re.error:
+                    continue
+                for text in texts:
+                    self.assertRegex(text, regex)
+                    self.assertIn(hint, text)
+
+
+@unittest.skipIf(paquet_facile.pathspec is None, "pathspec is not installed")
+@unittest.skipIf(shutil.which("git") is None, "git is not installed")
+class WalkFilesTestCase(unittest.TestCase):
+    FILES = {
+        ".gitignore": "*.log\n!keep.log\nbuild/\n/top.txt\n",
+        "a.log": "",
+        "keep.log": "",
+        "top.txt": "",
+        "build/out.txt": "",
+        "src/top.txt": "",
+        "src/build": "",  # directory-only pattern: a file is not ignored
+        "src/.gitignore": "!debug.log\n/local.txt\ncache/\n",
+        "src/debug.log": "",
+        "src/other.log": "",
+        "src/local.txt": "",
+        "src/cache/x.txt": "",
+        "src/sub/local.txt": "",
+        "src/sub/debug.log": "",
+        "src/sub/.gitignore": "!/other.log\n",
+        "src/sub/other.log": "",
+        "src/sub/build/y.txt": "",
+        "docs/secret.md": "",
+        "docs/readme.md": "",
+    }
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
+        self.git("init", "-q")
+        (self.root / ".git/info/exclude").write_text("secret.md\n")
+        for name, content in self.FILES.items():
+            path = self.root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content)
+
+    def git(self, *args: str) -> str:
+        return subprocess.run(
+            ["git", *args], cwd=self.root, check=True, capture_output=True, text=True
+        ).stdout
+
+    def test_matches_git_ls_files(self):
+        # The user's global excludes file must not leak into the comparison
+        expected = self.git(
+            "-c",
+            "core.excludesFile=",
+            "ls-files",
+            "--cached",
+            "--others",
+            "--exclude-standard",
+        ).splitlines()
+        self.assertEqual(sorted(paquet_facile._walk_files(self.root)), sorted(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()